@@ -1,6 +1,7 @@
 # config.py (Final, Corrected Version based on the working example)
 import os
 from datetime import timedelta
+from sqlalchemy.pool import QueuePool
 
 class Config:
     # Standard Flask secret key
@@ -27,25 +28,36 @@ class Config:
 
     # 1. Database Directory
     DB_DIR = os.path.join(PERSISTENCE_DIR, 'db')
-    os.makedirs(DB_DIR, exist_ok=True)
 
     # 2. Database URI
     DB_PATH = os.path.join(DB_DIR, 'nyota.db')
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{DB_PATH}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Reuse a small set of connections across gunicorn threads instead of
+    # reopening nyota.db (and its -wal/-shm files) per request.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "poolclass": QueuePool,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        # Room for every distinct statement the routes compile, so hot lookups
+        # (settings, login, asset pages) only bind parameters per call.
+        "query_cache_size": 1200,
+        "connect_args": {"check_same_thread": False, "timeout": 30},
+    }
 
     # 3. User Data Directory (Uploads)
     USER_DATA_DIR = os.path.join(PERSISTENCE_DIR, 'userdata')
-    os.makedirs(USER_DATA_DIR, exist_ok=True)
 
     # Specific subfolders for organization
     COVERS_DIR = os.path.join(USER_DATA_DIR, 'covers')
     LOGOS_DIR = os.path.join(USER_DATA_DIR, 'logos')
     SECURE_UPLOADS_DIR = os.path.join(USER_DATA_DIR, 'secure_uploads')
 
-    os.makedirs(COVERS_DIR, exist_ok=True)
-    os.makedirs(LOGOS_DIR, exist_ok=True)
-    os.makedirs(SECURE_UPLOADS_DIR, exist_ok=True)
+    # Directories the app writes into. They are created once by the app
+    # factory (see main._ensure_dirs), not as a side effect of importing config.
+    REQUIRED_DIRS = ('DB_DIR', 'USER_DATA_DIR', 'COVERS_DIR', 'LOGOS_DIR', 'SECURE_UPLOADS_DIR')
 
     # Keep Reference to Base Dir for other things if needed
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
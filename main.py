@@ -5,19 +5,99 @@ This is the application factory for the Nyota ✨ project.
 """
 
 import os
-import json
 from datetime import timedelta
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
-from flask import Flask, g, session, request
-from flask_babel import Babel
-import mistune
+import orjson
+from flask import Flask, g, session, request, has_app_context
+from flask.json.provider import DefaultJSONProvider
 from flask_compress import Compress
+from markupsafe import Markup, escape
+from sqlalchemy import event
 
 from config import Config
-from models.nyota import db, migrate
+from models.nyota import db, Creator
 from routes import main_bp, admin_bp
 
-babel = Babel()
+# Directories already created by this process, so repeat create_app() calls
+# with the same config skip the filesystem while a new config still gets its own.
+_ready_dirs = set()
+
+
+def _fast_mkdir(path):
+    """Create a leaf directory, falling back to makedirs on first run."""
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        pass
+    except FileNotFoundError:
+        os.makedirs(path, exist_ok=True)
+
+
+def _ensure_dirs(app):
+    """Create the configured persistence directories, once per path."""
+    for key in app.config.get('REQUIRED_DIRS', ()):
+        path = app.config.get(key)
+        if path and path not in _ready_dirs:
+            _fast_mkdir(path)
+            _ready_dirs.add(path)
+
+
+def _configure_sqlite(app):
+    """Apply per-connection PRAGMAs so readers don't block behind writers."""
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.close()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson. Types orjson doesn't own (dates, Decimal, ...)
+    are handed to DefaultJSONProvider.default. Keys are not sorted and non-ASCII
+    text is emitted as UTF-8 rather than \\u escapes.
+    """
+    _options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, **kwargs):
+        option = self._options
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        # Callers passing options (e.g. the session serializer's object_hook,
+        # which untags tuples, bytes and datetimes) need the stdlib decoder.
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+def _install_query_counter(app):
+    """Debug only: count SQL statements per request and log the total, so N+1
+    regressions show up in the dev server output."""
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_query(conn, cursor, statement, parameters, context, executemany):
+        if has_app_context():
+            g._sql_count = g.get('_sql_count', 0) + 1
+
+    @app.after_request
+    def _log_query_count(response):
+        count = g.get('_sql_count', 0)
+        if count:
+            app.logger.debug(f"{request.method} {request.path}: {count} SQL queries")
+        return response
 
 # --- Jinja2 Custom Filters ---
 
@@ -26,32 +106,65 @@ def format_currency(value, symbol='$'):
         return f"{symbol} 0.00"
     return f"{symbol} {float(value):,.2f}"
 
+def nl2br(value):
+    if not value:
+        return ""
+    return Markup(str(escape(value)).replace('\n', '<br>\n'))
+
+def render_markdown(text):
+    # mistune is only loaded the first time a template renders markdown.
+    import mistune
+    return mistune.html(text)
+
+def local_dt_filter(dt, fmt='%b %d, %Y %I:%M %p'):
+    """Convert a naive UTC datetime to the creator's local timezone."""
+    if dt is None:
+        return ''
+    tz_str = None
+    if hasattr(g, 'creator') and g.creator:
+        tz_str = g.creator.get_setting('creator_timezone')
+    if not tz_str:
+        return dt.strftime(fmt)
+    try:
+        local = dt.replace(tzinfo=ZoneInfo('UTC')).astimezone(ZoneInfo(tz_str))
+        return local.strftime(fmt)
+    except (ZoneInfoNotFoundError, Exception):
+        return dt.strftime(fmt)
+
 from utils.translator import translate
 
 # --- Language Selection for Babel ---
 
 def get_locale():
+    # Babel calls this for every translation; resolve once per request and
+    # keep the result on g.language, which the translator also reads.
+    locale = g.get('language')
+    if locale:
+        return locale
+
     if 'language' in session:
-        return session['language']
-    
-    # Check headers for country code (Cloudflare, App Engine, or Generic)
-    country = request.headers.get('CF-IPCountry') or \
-              request.headers.get('X-AppEngine-Country') or \
-              request.headers.get('X-Country-Code')
-    
-    # If a country is detected and it is NOT Tanzania, default to English
-    if country and country.upper() != 'TZ':
-        return 'en'
-        
-    # Default to Swahili for Tanzania and all unknown locations
-    return 'sw'
+        locale = session['language']
+    else:
+        # Check headers for country code (Cloudflare, App Engine, or Generic)
+        country = request.headers.get('CF-IPCountry') or \
+                  request.headers.get('X-AppEngine-Country') or \
+                  request.headers.get('X-Country-Code')
+
+        # If a country is detected and it is NOT Tanzania, default to English.
+        # Default to Swahili for Tanzania and all unknown locations.
+        locale = 'en' if country and country.upper() != 'TZ' else 'sw'
+
+    g.language = locale
+    return locale
 
 
 # --- Application Factory Function ---
 
 def create_app(config_class=Config):
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     app.config.from_object(config_class)
+    _ensure_dirs(app)
 
     # Trust the reverse proxy's X-Forwarded-Proto header so request.url_root
     # uses https:// instead of http:// when behind nginx/Cloudflare.
@@ -60,41 +173,34 @@ def create_app(config_class=Config):
 
     # --- Initialize Flask Extensions ---
     db.init_app(app)
-    migrate.init_app(app, db)
-    babel.init_app(app, locale_selector=get_locale)
+    # Only the `flask db` CLI uses Migrate, so import it with the factory.
+    from flask_migrate import Migrate
+    Migrate(app, db)
+    _configure_sqlite(app)
+    if app.debug:
+        _install_query_counter(app)
+    # Imported here so scripts that only need an app context skip the cost
+    # until an app is actually built.
+    from flask_babel import Babel
+    Babel(app, locale_selector=get_locale)
     Compress(app)
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000  # 1 year cache for static files
 
     # --- Register Jinja2 Filters ---
-    app.jinja_env.filters['format_currency'] = format_currency
-
-    def nl2br(value):
-        from markupsafe import Markup, escape
-        if not value:
-            return ""
-        return Markup(str(escape(value)).replace('\n', '<br>\n'))
-    
-    app.jinja_env.filters['nl2br'] = nl2br
-    
-    # This lambda function takes text, processes it with mistune, and returns HTML.
-    app.jinja_env.filters['markdown'] = lambda text: mistune.html(text)
-
-    def local_dt_filter(dt, fmt='%b %d, %Y %I:%M %p'):
-        """Convert a naive UTC datetime to the creator's local timezone."""
-        if dt is None:
-            return ''
-        tz_str = None
-        if hasattr(g, 'creator') and g.creator:
-            tz_str = g.creator.get_setting('creator_timezone')
-        if not tz_str:
-            return dt.strftime(fmt)
-        try:
-            local = dt.replace(tzinfo=ZoneInfo('UTC')).astimezone(ZoneInfo(tz_str))
-            return local.strftime(fmt)
-        except (ZoneInfoNotFoundError, Exception):
-            return dt.strftime(fmt)
-
-    app.jinja_env.filters['local_dt'] = local_dt_filter
+    app.jinja_env.filters.update({
+        'format_currency': format_currency,
+        'nl2br': nl2br,
+        'markdown': render_markdown,
+        'local_dt': local_dt_filter,
+    })
+
+    # Outside debug, templates are never reloaded, so keep their compiled
+    # bytecode on disk: gunicorn workers and restarts load it instead of
+    # re-parsing every template on first render. With no directory given,
+    # Jinja uses a per-user 0700 temp dir and refuses one it doesn't own.
+    if not app.debug:
+        from jinja2 import FileSystemBytecodeCache
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
 
     # --- Register Blueprints ---
     app.register_blueprint(main_bp)
@@ -105,7 +211,7 @@ def create_app(config_class=Config):
     def before_request_tasks():
         session.permanent = True
         app.permanent_session_lifetime = timedelta(days=30)
-        g.language = get_locale()
+        get_locale()
 
     # --- Context Processors ---
     @app.context_processor
@@ -117,11 +223,14 @@ def create_app(config_class=Config):
         )
 
     def get_currency_symbol():
-        from models.nyota import Creator
-        creator = Creator.query.first()
-        if creator:
-            return creator.get_setting('payment_uza_currency', 'TZS')
-        return 'TZS'
+        # Context processors run for every rendered template; resolve the
+        # symbol once per request.
+        symbol = g.get('_currency_symbol')
+        if symbol is None:
+            creator = Creator.query.first()
+            symbol = creator.get_setting('payment_uza_currency', 'TZS') if creator else 'TZS'
+            g._currency_symbol = symbol
+        return symbol
 
     # --- Cache Headers for Static Assets ---
     @app.after_request
@@ -133,7 +242,6 @@ def create_app(config_class=Config):
 
     # Start background worker (scheduled campaigns + subscription reminders).
     # Suppressed during flask db migrate / flask db upgrade via env var.
-    import os
     if not os.environ.get('FLASK_SKIP_BACKGROUND_WORKER'):
         from services.background_tasks import start_background_worker
         start_background_worker(app)
@@ -0,0 +1,37 @@
+"""digital_asset (creator_id, updated_at) and purchase (asset_id, purchase_date) indexes
+
+Revision ID: a8e5c1d9f3b2
+Revises: f2c9a4e7b815
+Create Date: 2026-10-16 13:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e5c1d9f3b2'
+down_revision = 'f2c9a4e7b815'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('digital_asset', 'ix_asset_creator_updated', ['creator_id', 'updated_at']),
+    ('purchase', 'ix_purchase_asset_date', ['asset_id', 'purchase_date']),
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns in INDEXES:
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name not in existing:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, name, _ in INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(name)
@@ -0,0 +1,29 @@
+"""comment (asset_id, created_at) index
+
+Revision ID: b6d3f8a2c1e7
+Revises: a8e5c1d9f3b2
+Create Date: 2026-10-16 14:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d3f8a2c1e7'
+down_revision = 'a8e5c1d9f3b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = {ix['name'] for ix in inspector.get_indexes('comment')}
+    if 'ix_comment_asset_created' not in existing:
+        with op.batch_alter_table('comment', schema=None) as batch_op:
+            batch_op.create_index('ix_comment_asset_created', ['asset_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_asset_created')
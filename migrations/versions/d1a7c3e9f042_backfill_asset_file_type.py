@@ -0,0 +1,55 @@
+"""backfill asset_file.file_type
+
+Revision ID: d1a7c3e9f042
+Revises: 9e285ad86707
+Create Date: 2026-10-16 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1a7c3e9f042'
+down_revision = '9e285ad86707'
+branch_labels = None
+depends_on = None
+
+
+# Mirrors the extension groups AssetFile.to_dict() falls back to for legacy rows.
+FILE_TYPE_EXTENSIONS = {
+    'pdf': ('pdf',),
+    'audio': ('mp3', 'wav', 'ogg', 'm4a', 'aac'),
+    'video': ('mp4', 'webm', 'mov', 'avi'),
+    'image': ('jpg', 'jpeg', 'png', 'gif', 'webp', 'svg'),
+}
+
+
+def upgrade():
+    # Classify every legacy row in one UPDATE instead of loading them through
+    # the ORM. SQLite's LIKE is case-insensitive for ASCII, and the second
+    # pattern covers storage paths that carry a query string.
+    asset_file = sa.table(
+        'asset_file',
+        sa.column('storage_path', sa.String),
+        sa.column('file_type', sa.String),
+    )
+    whens = []
+    for file_type, extensions in FILE_TYPE_EXTENSIONS.items():
+        patterns = []
+        for ext in extensions:
+            patterns.append(asset_file.c.storage_path.like(f'%.{ext}'))
+            patterns.append(asset_file.c.storage_path.like(f'%.{ext}?%'))
+        whens.append((sa.or_(*patterns), file_type))
+
+    op.execute(
+        asset_file.update()
+        .where(sa.or_(asset_file.c.file_type.is_(None), asset_file.c.file_type == ''))
+        .values(file_type=sa.case(*whens, else_='other'))
+    )
+
+
+def downgrade():
+    # Backfilled values are indistinguishable from ones set at upload time,
+    # and to_dict() derives the same value when the column is empty.
+    pass
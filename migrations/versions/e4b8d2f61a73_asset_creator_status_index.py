@@ -0,0 +1,47 @@
+"""asset (creator_id, status) index; drop redundant creator_setting indexes
+
+Revision ID: e4b8d2f61a73
+Revises: d1a7c3e9f042
+Create Date: 2026-10-16 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8d2f61a73'
+down_revision = 'd1a7c3e9f042'
+branch_labels = None
+depends_on = None
+
+
+def _index_names(table):
+    conn = op.get_bind()
+    return {ix['name'] for ix in sa.inspect(conn).get_indexes(table)}
+
+
+def upgrade():
+    # Admin listings filter by creator first, then by status.
+    if 'ix_asset_creator_status' not in _index_names('digital_asset'):
+        with op.batch_alter_table('digital_asset', schema=None) as batch_op:
+            batch_op.create_index('ix_asset_creator_status', ['creator_id', 'status'], unique=False)
+
+    # _creator_key_uc already indexes (creator_id, key), so creator_id lookups
+    # use its leading column. Nothing queries settings by key alone, so the
+    # key-only index was pure write overhead.
+    existing = _index_names('creator_setting')
+    with op.batch_alter_table('creator_setting', schema=None) as batch_op:
+        if 'ix_creator_setting_key' in existing:
+            batch_op.drop_index('ix_creator_setting_key')
+        if 'ix_creator_setting_creator_id' in existing:
+            batch_op.drop_index('ix_creator_setting_creator_id')
+
+
+def downgrade():
+    with op.batch_alter_table('creator_setting', schema=None) as batch_op:
+        batch_op.create_index('ix_creator_setting_creator_id', ['creator_id'], unique=False)
+        batch_op.create_index('ix_creator_setting_key', ['key'], unique=False)
+
+    with op.batch_alter_table('digital_asset', schema=None) as batch_op:
+        batch_op.drop_index('ix_asset_creator_status')
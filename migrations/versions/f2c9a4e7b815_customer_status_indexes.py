@@ -0,0 +1,39 @@
+"""purchase/subscription (customer_id, status) indexes
+
+Revision ID: f2c9a4e7b815
+Revises: e4b8d2f61a73
+Create Date: 2026-10-16 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c9a4e7b815'
+down_revision = 'e4b8d2f61a73'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('purchase', 'ix_purchase_customer_status'),
+    ('subscription', 'ix_subscription_customer_status'),
+)
+
+
+def upgrade():
+    # SQLite has no CREATE INDEX CONCURRENTLY; these tables are small enough
+    # for a plain build inside the migration transaction.
+    inspector = sa.inspect(op.get_bind())
+    for table, name in INDEXES:
+        existing = {ix['name'] for ix in inspector.get_indexes(table)}
+        if name not in existing:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.create_index(name, ['customer_id', 'status'], unique=False)
+
+
+def downgrade():
+    for table, name in INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(name)
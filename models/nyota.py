@@ -10,17 +10,18 @@ with a professional, scalable model for creator settings and preferences.
 
 import enum
 import uuid
+from functools import lru_cache
 import secrets
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
-from slugify import slugify
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import exists, lambda_stmt, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import attribute_keyed_dict
 from sqlalchemy.types import JSON
 
-# Initialize extensions
+# Initialize extensions (Flask-Migrate is wired up in the app factory)
 db = SQLAlchemy()
-migrate = Migrate()
 
 # --- Enums for Standardized Field Choices ---
 # (These enums are unchanged as they are solid)
@@ -60,6 +61,11 @@ class PurchaseStatus(enum.Enum):
     COMPLETED = "Completed"
     FAILED = "Failed"
 
+# Precomputed enum lookups so request handlers don't rebuild member lists.
+ASSET_TYPE_ORDER = {t: i for i, t in enumerate(AssetType)}
+ASSET_STATUS_BY_VALUE = {s.value: s for s in AssetStatus}
+ASSET_STATUS_VALUES = tuple(ASSET_STATUS_BY_VALUE)
+
 class CreatorSetting(db.Model):
     """
     A scalable, key-value store for all creator-specific settings.
@@ -68,15 +74,41 @@ class CreatorSetting(db.Model):
     """
     __tablename__ = 'creator_setting'
     id = db.Column(db.Integer, primary_key=True)
-    creator_id = db.Column(db.Integer, db.ForeignKey('creator.id'), nullable=False, index=True)
-    key = db.Column(db.String(128), nullable=False, index=True)
+    creator_id = db.Column(db.Integer, db.ForeignKey('creator.id'), nullable=False)
+    key = db.Column(db.String(128), nullable=False)
     value = db.Column(JSON, nullable=True)
 
+    # The unique constraint's index serves (creator_id) and (creator_id, key) lookups;
+    # settings are never queried by key alone.
     __table_args__ = (db.UniqueConstraint('creator_id', 'key', name='_creator_key_uc'),)
 
+    @classmethod
+    def bulk_upsert(cls, creator_id, values):
+        """
+        Inserts or updates many settings for a creator with a single
+        INSERT ... ON CONFLICT (creator_id, key) DO UPDATE statement.
+        """
+        if not values:
+            return
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(cls).values([
+            {'creator_id': creator_id, 'key': key, 'value': value}
+            for key, value in values.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['creator_id', 'key'],
+            set_={'value': stmt.excluded.value}
+        )
+        db.session.execute(stmt)
+
     def __repr__(self):
         return f'<CreatorSetting {self.creator_id} - {self.key}>'
 
+def _creator_settings_stmt(creator_id):
+    # lambda_stmt caches the compiled SELECT; creator_id is tracked as a bound parameter.
+    return lambda_stmt(lambda: select(CreatorSetting.key, CreatorSetting.value)
+                       .where(CreatorSetting.creator_id == creator_id))
+
 # ==============================================================================
 # == OFFICIAL SETTINGS KEYS REFERENCE
 # ==============================================================================
@@ -196,27 +228,57 @@ class Creator(db.Model):
 
     # Relationships
     assets = db.relationship('DigitalAsset', back_populates='creator', lazy='dynamic')
-    settings = db.relationship('CreatorSetting', cascade="all, delete-orphan", lazy='dynamic')
+    # Keyed by setting name so writes find their row with a dict lookup.
+    settings = db.relationship(
+        'CreatorSetting', cascade="all, delete-orphan",
+        collection_class=attribute_keyed_dict('key'),
+    )
     
+    def settings_map(self):
+        """
+        Returns all settings for this creator as a {key: value} dict.
+        The rows are fetched with a single query the first time a setting is read
+        and kept on the instance, which lives for one request/session.
+        """
+        cache = self.__dict__.get('_settings_cache')
+        if cache is None:
+            cache = dict(db.session.execute(_creator_settings_stmt(self.id)).all())
+            self._settings_cache = cache
+        return cache
+
     def get_setting(self, key, default=None):
         """
         Convenience method to retrieve a setting value for this creator.
         Example Usage: g.creator.get_setting('telegram_bot_token')
         """
-        setting = self.settings.filter_by(key=key).first()
-        return setting.value if setting else default
+        cache = self.settings_map()
+        return cache[key] if key in cache else default
 
     def set_setting(self, key, value):
         """
         Convenience method to set or update a setting for this creator.
+        Writes through to the cached settings map.
         Example Usage: g.creator.set_setting('telegram_bot_token', 'new_token')
         """
-        setting = self.settings.filter_by(key=key).first()
+        # The collection is loaded once, so a run of writes costs a single SELECT.
+        setting = self.settings.get(key)
         if setting:
             setting.value = value
         else:
-            setting = CreatorSetting(creator_id=self.id, key=key, value=value)
-            db.session.add(setting)
+            self.settings[key] = CreatorSetting(key=key, value=value)
+        if '_settings_cache' in self.__dict__:
+            self._settings_cache[key] = value
+
+    def set_settings(self, values):
+        """
+        Bulk version of set_setting() for saving a whole form at once.
+        Example Usage: g.creator.set_settings({'store_bio': '...', 'sms_enabled': True})
+        """
+        CreatorSetting.bulk_upsert(self.id, values)
+        # The upsert bypasses the ORM, so reload the collection on next access.
+        db.session.expire(self, ['settings'])
+        if '_settings_cache' in self.__dict__:
+            self._settings_cache.update(values)
 
     def __repr__(self):
         return f'<Creator {self.username}>'
@@ -235,42 +297,47 @@ class Customer(db.Model):
     ratings = db.relationship('Rating', back_populates='customer')
     ambassador_profile = db.relationship('Ambassador', back_populates='customer', uselist=False)
 
+    @hybrid_property
+    def has_active_subscription(self):
+        return any(s.status == SubscriptionStatus.ACTIVE for s in self.subscriptions)
+
+    @has_active_subscription.expression
+    def has_active_subscription(cls):
+        return exists().where(
+            Subscription.customer_id == cls.id,
+            Subscription.status == SubscriptionStatus.ACTIVE
+        )
+
     def to_dict_detailed(self, creator_id=None):
-        """Serializes the customer with aggregated purchase and status data."""
-        
-        # Calculate total spent and number of purchases
+        """
+        Serializes the customer with aggregated purchase and status data.
+        List views should selectinload Customer.purchases (and Purchase.asset):
+        totals and acquisition details come from one pass over that collection.
+        """
         total_spent = 0
         purchase_count = 0
-        for p in self.purchases:
-            # Skip if asset is missing (deleted or data integrity issue)
-            if not p.asset:
-               continue
-               
-            # Filter by creator if specified to ensure isolation
-            if creator_id and p.asset.creator_id != creator_id:
-                continue
-                
-            if p.status == PurchaseStatus.COMPLETED:
-                total_spent += p.amount_paid
-                purchase_count += 1
-        
+
         # Determine status (e.g., is they an active subscriber?)
-        is_subscriber = any(s.status == 'active' for s in self.subscriptions)
+        is_subscriber = self.has_active_subscription
 
         # Determine how this customer was first acquired
         first_successful_refcode = None
         first_source = None
         for p in sorted(self.purchases, key=lambda x: x.purchase_date):
+            # Skip if asset is missing (deleted or data integrity issue)
             if not p.asset:
                 continue
+            # Filter by creator if specified to ensure isolation
             if creator_id and p.asset.creator_id != creator_id:
                 continue
-            if p.status == PurchaseStatus.COMPLETED and p.refcode_outcome == 'customer_success':
-                if first_successful_refcode is None:
-                    first_successful_refcode = p.refcode_used
-            if p.status == PurchaseStatus.COMPLETED and p.source_used:
-                if first_source is None:
-                    first_source = p.source_used
+            if p.status != PurchaseStatus.COMPLETED:
+                continue
+            total_spent += p.amount_paid
+            purchase_count += 1
+            if p.refcode_outcome == 'customer_success' and first_successful_refcode is None:
+                first_successful_refcode = p.refcode_used
+            if p.source_used and first_source is None:
+                first_source = p.source_used
 
         return {
             'id': self.id,
@@ -299,6 +366,10 @@ class DigitalAsset(db.Model):
     multi-step asset creation form and includes future-proofing for engagement and AI.
     """
     __tablename__ = 'digital_asset'
+    __table_args__ = (
+        db.Index('ix_asset_creator_status', 'creator_id', 'status'),
+        db.Index('ix_asset_creator_updated', 'creator_id', 'updated_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     creator_id = db.Column(db.Integer, db.ForeignKey('creator.id'), nullable=False)
     
@@ -340,18 +411,27 @@ class DigitalAsset(db.Model):
 
     # Relationships
     creator = db.relationship('Creator', back_populates='assets')
-    files = db.relationship('AssetFile', back_populates='asset', cascade="all, delete-orphan", lazy='dynamic') # Use lazy='dynamic' for files
+    files = db.relationship('AssetFile', back_populates='asset', cascade="all, delete-orphan")
     purchases = db.relationship('Purchase', back_populates='asset')
     ratings = db.relationship('Rating', back_populates='asset')
     comments = db.relationship('Comment', back_populates='asset')
 
+    @classmethod
+    def slug_taken(cls, slug, exclude_id=None):
+        """Returns True if another asset already uses `slug` (an EXISTS probe, no row load)."""
+        criteria = [cls.slug == slug]
+        if exclude_id is not None:
+            criteria.append(cls.id != exclude_id)
+        return db.session.query(exists().where(*criteria)).scalar()
+
     def to_dict(self):
         """Serializes the asset object to a dictionary for JSON conversion."""
         
         # Helper to format date and time if they exist. event_date is stored as a
         # NAIVE datetime holding the creator's wall-clock time (what the admin typed).
-        event_date_str = self.event_date.strftime('%Y-%m-%d') if self.event_date else None
-        event_time_str = self.event_date.strftime('%H:%M') if self.event_date else None
+        event_iso = self.event_date.isoformat() if self.event_date else None
+        event_date_str = event_iso[:10] if event_iso else None   # YYYY-MM-DD
+        event_time_str = event_iso[11:16] if event_iso else None  # HH:MM
 
         # Resolve the event against the creator's configured timezone so the public
         # always sees the SAME canonical wall-clock the admin set, while the calendar
@@ -408,7 +488,7 @@ class DigitalAsset(db.Model):
             'uza_product_id': (self.details or {}).get('uza_product_id', ''),
             
             # Use the to_dict method from AssetFile for clean serialization
-            'files': [f.to_dict() for f in self.files.all()],
+            'files': [f.to_dict() for f in self.files],
             # This will be an array of review dictionaries
             'reviews': [r.to_dict() for r in self.ratings],
             # Create nested objects that the frontend component expects
@@ -438,6 +518,12 @@ class DigitalAsset(db.Model):
     def __repr__(self):
         return f'<DigitalAsset {self.id}: {self.title}>'
 
+@lru_cache(maxsize=1024)
+def _slugify_title(title):
+    # Only needed when an asset is created without a slug.
+    from slugify import slugify
+    return slugify(title)
+
 # === THIS IS THE FIX: A SQLAlchemy event listener that runs before an insert. ===
 @db.event.listens_for(DigitalAsset, 'before_insert')
 def generate_slug(mapper, connection, target):
@@ -447,15 +533,36 @@ def generate_slug(mapper, connection, target):
     """
     if not target.slug and target.title:
         # Generate a base slug from the title
-        base_slug = slugify(target.title)
+        base_slug = _slugify_title(target.title)
+        # Fetch every slug sharing this prefix in one go and pick the first free
+        # suffix in Python. A range predicate (rather than LIKE, which SQLite
+        # won't run against a BINARY index) keeps this an index range scan.
+        slug_col = DigitalAsset.__table__.c.slug
+        taken = set(connection.execute(
+            select(slug_col).where(slug_col >= base_slug, slug_col < base_slug + '\x7f')
+        ).scalars())
         unique_slug = base_slug
-        # Check for uniqueness and append a number if necessary to avoid collisions
         n = 1
-        while db.session.query(DigitalAsset.id).filter_by(slug=unique_slug).first():
+        while unique_slug in taken:
             unique_slug = f"{base_slug}-{n}"
             n += 1
         target.slug = unique_slug
 
+# Extension -> AssetFile.file_type, built once instead of per-file list scans.
+FILE_TYPE_BY_EXTENSION = {
+    'pdf': 'pdf',
+    'mp3': 'audio', 'wav': 'audio', 'ogg': 'audio', 'm4a': 'audio', 'aac': 'audio',
+    'mp4': 'video', 'webm': 'video', 'mov': 'video', 'avi': 'video',
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image', 'svg': 'image',
+}
+
+def infer_file_type(path):
+    """Classify a filename, storage path or URL by its extension."""
+    if not path or '.' not in path:
+        return 'other'
+    ext = path.rpartition('.')[2].partition('?')[0].lower()
+    return FILE_TYPE_BY_EXTENSION.get(ext, 'other')
+
 class AssetFile(db.Model):
     __tablename__ = 'asset_file'
     id = db.Column(db.Integer, primary_key=True)
@@ -474,18 +581,7 @@ class AssetFile(db.Model):
         # Compute file_type if not set (for legacy files)
         file_type = self.file_type
         if not file_type and self.storage_path:
-            # Extract extension from storage_path
-            ext = self.storage_path.split('.')[-1].lower().split('?')[0] if '.' in self.storage_path else ''
-            if ext in ['pdf']:
-                file_type = 'pdf'
-            elif ext in ['mp3', 'wav', 'ogg', 'm4a', 'aac']:
-                file_type = 'audio'
-            elif ext in ['mp4', 'webm', 'mov', 'avi']:
-                file_type = 'video'
-            elif ext in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'svg']:
-                file_type = 'image'
-            else:
-                file_type = 'other'
+            file_type = infer_file_type(self.storage_path)
             
         return { 
             'id': self.id, 
@@ -498,6 +594,10 @@ class AssetFile(db.Model):
 
 class Purchase(db.Model):
     __tablename__ = 'purchase'
+    __table_args__ = (
+        db.Index('ix_purchase_customer_status', 'customer_id', 'status'),
+        db.Index('ix_purchase_asset_date', 'asset_id', 'purchase_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     transaction_token = db.Column(db.String(36), unique=True, nullable=False, index=True, default=lambda: str(uuid.uuid4()))
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
@@ -533,6 +633,9 @@ class Purchase(db.Model):
 
 class Subscription(db.Model):
     __tablename__ = 'subscription'
+    __table_args__ = (
+        db.Index('ix_subscription_customer_status', 'customer_id', 'status'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
     asset_id = db.Column(db.Integer, db.ForeignKey('digital_asset.id'), nullable=False)
@@ -547,6 +650,9 @@ class Subscription(db.Model):
 
 class Comment(db.Model):
     __tablename__ = 'comment'
+    __table_args__ = (
+        db.Index('ix_comment_asset_created', 'asset_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
     asset_id = db.Column(db.Integer, db.ForeignKey('digital_asset.id'), nullable=False)
@@ -4,36 +4,41 @@ import json
 import os
 import decimal
 import qrcode
+import qrcode.image.svg
 import io
-import base64
 import time
+from time import monotonic
 import uuid
 import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import re
+import hmac
+import orjson
 from datetime import datetime, date, time, timedelta
 import csv
 import io
-from functools import wraps
+from functools import wraps, lru_cache
 from flask import (
     Blueprint, render_template, request, jsonify, redirect, 
     url_for, flash, g, session, current_app, abort, send_from_directory,
     Response
 )
 from werkzeug.utils import secure_filename
-from sqlalchemy import or_, func, distinct, case, text
+from sqlalchemy import and_, or_, func, distinct, case, text, select, bindparam
 from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 from models.nyota import (
-    db, Creator, CreatorSetting, DigitalAsset, AssetFile,
-    Purchase, Customer, Comment,
+    db, Creator, DigitalAsset, AssetFile,
+    Purchase, Customer, Comment, Rating,
     Ambassador, AssetStatus, AssetType, PurchaseStatus,
     SubscriptionInterval,
     AccessAttempt, SMSMagicLink,
     SMSCampaign, SMSCampaignLog, SMSCampaignStatus,
-    SMSLog, SMSLogType
+    SMSLog, SMSLogType, infer_file_type,
+    ASSET_TYPE_ORDER, ASSET_STATUS_BY_VALUE, ASSET_STATUS_VALUES
 )
 from utils.security import creator_login_required, generate_totp_secret, get_totp_uri, verify_totp
 from utils.translator import translate
@@ -42,6 +47,40 @@ from utils.phone import normalize_phone_number
 from extensions import limiter
 from services.sms_service import get_sms_provider
 
+# Loader options for queries whose results are passed to DigitalAsset.to_dict().
+ASSET_SERIALIZE_OPTIONS = (
+    db.selectinload(DigitalAsset.files),
+    db.selectinload(DigitalAsset.ratings).joinedload(Rating.customer),
+)
+
+# Statements for the hottest single-row lookups, built once at import so each
+# request only binds parameters against SQLAlchemy's cached compiled form.
+_CREATOR_BY_USERNAME = select(Creator).where(Creator.username == bindparam('username'))
+_CUSTOMER_BY_PHONE = select(Customer).where(Customer.whatsapp_number == bindparam('phone'))
+
+def get_customer_by_phone(phone):
+    return db.session.execute(_CUSTOMER_BY_PHONE, {'phone': phone}).scalar_one_or_none()
+
+# Setup completion is one-way (creators are never deleted), so once a creator
+# has been seen the answer is cached for the life of the process. A negative
+# result is not cached: setup may finish in another gunicorn worker.
+_creator_exists = False
+_creator_exists_lock = threading.Lock()
+
+def creator_exists():
+    global _creator_exists
+    if _creator_exists:
+        return True
+    with _creator_exists_lock:
+        if not _creator_exists:
+            _creator_exists = db.session.query(db.session.query(Creator.id).exists()).scalar()
+        return _creator_exists
+
+def mark_creator_exists():
+    global _creator_exists
+    with _creator_exists_lock:
+        _creator_exists = True
+
 # --- Helper for JSON serialization ---
 def json_serial(obj):
     """JSON serializer for objects not serializable by default json code."""
@@ -50,6 +89,11 @@ def json_serial(obj):
     if hasattr(obj, 'value'): return obj.value
     raise TypeError(f"Type {type(obj)} not serializable")
 
+def to_json(obj):
+    """Serializes `obj` for embedding in templates. orjson handles datetimes
+    and enums natively; json_serial covers Decimal."""
+    return orjson.dumps(obj, default=json_serial, option=orjson.OPT_NON_STR_KEYS).decode()
+
 # --- Blueprint Definitions ---
 main_bp = Blueprint('main', __name__)
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -63,13 +107,13 @@ def before_admin_request():
     """Smart request hook to handle all admin authentication and setup logic."""
     public_endpoints = ['admin.creator_setup', 'admin.creator_login', 'admin.creator_login_verify']
     
-    if not Creator.query.first():
+    if not creator_exists():
         if request.endpoint not in ['admin.creator_setup']:
             return redirect(url_for('admin.creator_setup'))
     elif 'creator_id' not in session and request.endpoint not in public_endpoints:
         return redirect(url_for('admin.creator_login'))
     elif 'creator_id' in session:
-        g.creator = Creator.query.get(session['creator_id'])
+        g.creator = db.session.get(Creator, session['creator_id'])
         if not g.creator:
             session.clear()
             return redirect(url_for('admin.creator_login'))
@@ -84,19 +128,30 @@ def utility_processor():
 
 # --- AUTH & SETUP ROUTES ---
 
+@lru_cache(maxsize=32)
+def make_qr_svg(uri):
+    """Renders `uri` as an inline SVG QR code. Vector output skips PIL
+    rasterizing and PNG compression; memoized so a failed TOTP verification
+    re-displays the same code without re-rendering it."""
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, border=2)
+    qr.add_data(uri)
+    qr.make(fit=True)
+    img = qr.make_image(image_factory=qrcode.image.svg.SvgPathFillImage)
+    return img.to_string(encoding='unicode')
+
 @admin_bp.route('/')
 def admin_home():
     """Primary entry point for `/admin`. Redirects user based on their state."""
     if 'creator_id' in session:
         return redirect(url_for('admin.creator_dashboard'))
-    elif Creator.query.first():
+    elif creator_exists():
         return redirect(url_for('admin.creator_login'))
     else:
         return redirect(url_for('admin.creator_setup'))
 
 @admin_bp.route('/setup', methods=['GET', 'POST'])
 def creator_setup():
-    if Creator.query.first(): return redirect(url_for('admin.creator_login'))
+    if creator_exists(): return redirect(url_for('admin.creator_login'))
     if request.method == 'POST':
         action = request.form.get('action')
         if action == 'create_user':
@@ -108,11 +163,8 @@ def creator_setup():
             totp_secret = generate_totp_secret()
             session['setup_info'] = {'username': username, 'totp_secret': totp_secret}
             totp_uri = get_totp_uri(username, session['setup_info']['totp_secret'])
-            img = qrcode.make(totp_uri)
-            buf = io.BytesIO()
-            img.save(buf)
-            qr_code_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-            return render_template('admin/setup.html', stage=2, qr_code=qr_code_b64, username=username)
+            qr_code_svg = make_qr_svg(totp_uri)
+            return render_template('admin/setup.html', stage=2, qr_code_svg=qr_code_svg, username=username)
 
         elif action == 'verify_totp':
             setup_info, token = session.get('setup_info'), request.form.get('token')
@@ -124,25 +176,25 @@ def creator_setup():
                 new_creator = Creator(username=setup_info['username'], totp_secret=setup_info['totp_secret'])
                 db.session.add(new_creator)
                 db.session.commit()
+                mark_creator_exists()
                 session.pop('setup_info', None)
                 flash(translate('setup_complete_success'), 'success')
                 return redirect(url_for('admin.creator_login'))
             else:
                 flash(translate('invalid_2fa_token'), 'danger')
                 totp_uri = get_totp_uri(setup_info['username'], setup_info['totp_secret'])
-                img = qrcode.make(totp_uri)
-                buf = io.BytesIO()
-                img.save(buf)
-                qr_code_b64 = base64.b64encode(buf.getvalue()).decode('utf-8')
-                return render_template('admin/setup.html', stage=2, qr_code=qr_code_b64, username=setup_info['username'])
+                qr_code_svg = make_qr_svg(totp_uri)
+                return render_template('admin/setup.html', stage=2, qr_code_svg=qr_code_svg, username=setup_info['username'])
     return render_template('admin/setup.html', stage=1)
 
 @admin_bp.route('/login', methods=['GET', 'POST'])
 def creator_login():
-    if not Creator.query.first(): return redirect(url_for('admin.creator_setup'))
+    if not creator_exists(): return redirect(url_for('admin.creator_setup'))
     if 'creator_id' in session: return redirect(url_for('admin.creator_dashboard'))
     if request.method == 'POST':
-        creator = Creator.query.filter_by(username=request.form.get('username')).first()
+        creator = db.session.execute(
+            _CREATOR_BY_USERNAME, {'username': request.form.get('username')}
+        ).scalar_one_or_none()
         if creator:
             session['2fa_creator_id'] = creator.id
             return redirect(url_for('admin.creator_login_verify'))
@@ -153,8 +205,9 @@ def creator_login():
 def creator_login_verify():
     if '2fa_creator_id' not in session: return redirect(url_for('admin.creator_login'))
     if request.method == 'POST':
-        creator = Creator.query.get(session['2fa_creator_id'])
-        if verify_totp(creator.totp_secret, request.form.get('token')):
+        creator = db.session.get(Creator, session['2fa_creator_id'])
+        # Verify even when the creator has vanished so both paths cost the same.
+        if verify_totp(creator.totp_secret if creator else None, request.form.get('token')) and creator:
             session.pop('2fa_creator_id', None)
             session['creator_id'] = creator.id
             return redirect(url_for('admin.creator_dashboard'))
@@ -169,6 +222,29 @@ def creator_logout():
 
 # --- CORE ADMIN ROUTES (Protected) ---
 
+# Dashboard stat cards only move when a purchase completes, so repeat loads
+# within DASHBOARD_STATS_TTL seconds reuse the last aggregate. Completing a
+# purchase drops that creator's entries in this worker; the TTL bounds how
+# stale another worker's copy can be.
+DASHBOARD_STATS_TTL = 60
+_dashboard_stats_cache = {}
+
+def _get_dashboard_stats(key):
+    entry = _dashboard_stats_cache.get(key)
+    if entry is not None and entry[0] > monotonic():
+        return entry[1]
+    return None
+
+def _set_dashboard_stats(key, stats):
+    now = monotonic()
+    for stale in [k for k, (expires, _) in list(_dashboard_stats_cache.items()) if expires <= now]:
+        _dashboard_stats_cache.pop(stale, None)
+    _dashboard_stats_cache[key] = (now + DASHBOARD_STATS_TTL, stats)
+
+def invalidate_dashboard_stats(creator_id):
+    for key in [k for k in list(_dashboard_stats_cache) if k[0] == creator_id]:
+        _dashboard_stats_cache.pop(key, None)
+
 @admin_bp.route('/dashboard')
 @creator_login_required
 def creator_dashboard():
@@ -221,48 +297,51 @@ def creator_dashboard():
     # But for a standard dashboard, often top cards update with filters. 
     # Let's align with "Earnings (This Month)" replacement -> "Earnings (Selected Period)"
     
-    # 1. Total Earnings (All Time, but filtered by Asset if selected)
-    total_earnings_query = db.session.query(func.sum(Purchase.amount_paid)).join(DigitalAsset).filter(
-        DigitalAsset.creator_id == g.creator.id,
-        Purchase.status == PurchaseStatus.COMPLETED
-    )
-    if asset_id:
-        total_earnings_query = total_earnings_query.filter(Purchase.asset_id == asset_id)
-    total_earnings = total_earnings_query.scalar() or decimal.Decimal(0)
-
-    # 2. Earnings (Selected Period)
-    period_earnings_query = base_query
-    if start_date:
-        period_earnings_query = period_earnings_query.filter(Purchase.purchase_date >= start_date)
-    if end_date and period == 'custom':
-        period_earnings_query = period_earnings_query.filter(Purchase.purchase_date <= end_date)
-    period_earnings = period_earnings_query.with_entities(func.sum(Purchase.amount_paid)).scalar() or decimal.Decimal(0)
-
-    # 3. Total Sales (Selected Period)
-    period_sales = period_earnings_query.with_entities(func.count(Purchase.id)).scalar() or 0
-
-    # 4. Supporters (Total Unique, filtered by Asset if selected)
-    # Note: Supporters count usually refers to total unique customers all time for the creator/asset
-    supporters_query = db.session.query(func.count(Customer.id.distinct())).join(Purchase).join(DigitalAsset).filter(
-        DigitalAsset.creator_id == g.creator.id,
-        Purchase.status == PurchaseStatus.COMPLETED
-    )
-    if asset_id:
-        supporters_query = supporters_query.filter(Purchase.asset_id == asset_id)
-    supporters_count = supporters_query.scalar() or 0
-
-    # New Supporters (Selected Period) - Customers whose *first* purchase was in this period? 
-    # Or just unique customers who bought in this period?
-    # Let's do unique customers who bought in this period for simplicity as "Active Supporters"
-    # period_supporters = period_earnings_query.with_entities(func.count(Purchase.customer_id.distinct())).scalar() or 0
+    stats_key = (g.creator.id, asset_id, period,
+                 start_date if period == 'custom' else None,
+                 end_date if period == 'custom' else None)
+    stats = _get_dashboard_stats(stats_key)
+    if stats is None:
+        # All four cards share the completed-purchases base, so they come back from
+        # one conditional aggregate: the period figures only count rows inside the
+        # selected window, the totals count everything.
+        period_conditions = []
+        if start_date:
+            period_conditions.append(Purchase.purchase_date >= start_date)
+        if end_date and period == 'custom':
+            period_conditions.append(Purchase.purchase_date <= end_date)
+        if period_conditions:
+            in_period = and_(*period_conditions)
+            period_amount = case((in_period, Purchase.amount_paid))
+            period_purchase_id = case((in_period, Purchase.id))
+        else:
+            period_amount, period_purchase_id = Purchase.amount_paid, Purchase.id
+
+        # Supporters: total unique customers all time for the creator/asset.
+        total_earnings, period_earnings, period_sales, supporters_count = base_query.with_entities(
+            func.sum(Purchase.amount_paid),
+            func.sum(period_amount),
+            func.count(period_purchase_id),
+            func.count(distinct(Purchase.customer_id)),
+        ).one()
+        total_earnings = total_earnings or decimal.Decimal(0)
+        period_earnings = period_earnings or decimal.Decimal(0)
+        period_sales = period_sales or 0
+        supporters_count = supporters_count or 0
+
+        # New Supporters (Selected Period) - Customers whose *first* purchase was in this period? 
+        # Or just unique customers who bought in this period?
+        # Let's do unique customers who bought in this period for simplicity as "Active Supporters"
+        # period_supporters = base_query.filter(in_period).with_entities(func.count(Purchase.customer_id.distinct())).scalar() or 0
     
-    stats = {
-        'total_earnings': total_earnings,
-        'period_earnings': period_earnings,
-        'period_sales': period_sales,
-        'supporters_count': supporters_count,
-        'period': period
-    }
+        stats = {
+            'total_earnings': total_earnings,
+            'period_earnings': period_earnings,
+            'period_sales': period_sales,
+            'supporters_count': supporters_count,
+            'period': period
+        }
+        _set_dashboard_stats(stats_key, stats)
     
     # --- RECENT ACTIVITY (SALES) with PAGINATION ---
     page = request.args.get('page', 1, type=int)
@@ -396,8 +475,13 @@ def export_dashboard_data():
     if refcode_filter:
         query = query.filter(Purchase.refcode_used == refcode_filter)
 
-    # Order by date desc
-    purchases = query.order_by(Purchase.purchase_date.desc()).all()
+    # Order by date desc. Rows are streamed in batches rather than hydrated all
+    # at once; the asset comes from the existing join and the customer is
+    # joined in, so the loop below doesn't lazy-load them per row.
+    purchases = query.options(
+        db.contains_eager(Purchase.asset),
+        db.joinedload(Purchase.customer)
+    ).order_by(Purchase.purchase_date.desc()).yield_per(500)
 
     # Generate CSV
     si = io.StringIO()
@@ -414,7 +498,7 @@ def export_dashboard_data():
     cw.writerow(headers)
 
     for p in purchases:
-        past_purchases = Purchase.query.filter(
+        past_purchases = Purchase.query.options(db.joinedload(Purchase.asset)).filter(
             Purchase.customer_id == p.customer_id,
             Purchase.id < p.id,
             Purchase.status == PurchaseStatus.COMPLETED
@@ -634,18 +718,30 @@ def list_assets():
     if search:
         query = query.filter(DigitalAsset.title.ilike(f"%{search}%"))
     
-    if status and status in [s.value for s in AssetStatus]:
-        query = query.filter(DigitalAsset.status == AssetStatus(status))
+    if status and status in ASSET_STATUS_BY_VALUE:
+        query = query.filter(DigitalAsset.status == ASSET_STATUS_BY_VALUE[status])
     
     # Admin list reflects the manual arrangement: pinned first, then display_order.
     # (The public-page ordering is governed separately by 'asset_sort_mode'.)
-    pagination = query.order_by(
+    # Only the columns the list shows are selected, so rows come back as plain
+    # tuples instead of hydrated DigitalAsset objects.
+    pagination = query.with_entities(
+        DigitalAsset.id,
+        DigitalAsset.title,
+        DigitalAsset.description,
+        DigitalAsset.cover_image_url,
+        DigitalAsset.asset_type,
+        DigitalAsset.status,
+        DigitalAsset.total_sales,
+        DigitalAsset.total_revenue,
+        DigitalAsset.updated_at,
+        DigitalAsset.is_pinned,
+        DigitalAsset.display_order,
+    ).order_by(
         DigitalAsset.is_pinned.desc(),
         DigitalAsset.display_order.asc(),
         DigitalAsset.updated_at.desc()
     ).paginate(page=page, per_page=per_page, error_out=False)
-    
-    creator_assets = pagination.items
 
     assets_data = [{
         'id': a.id,
@@ -659,19 +755,25 @@ def list_assets():
         'updated_at': a.updated_at,
         'is_pinned': a.is_pinned,
         'display_order': a.display_order,
-    } for a in creator_assets]
+    } for a in pagination.items]
     
     # --- STATS ---
+    total_assets, published_count, total_revenue, total_sales = db.session.query(
+        func.count(DigitalAsset.id),
+        func.count(case((DigitalAsset.status == AssetStatus.PUBLISHED, DigitalAsset.id))),
+        func.sum(DigitalAsset.total_revenue),
+        func.sum(DigitalAsset.total_sales),
+    ).filter_by(creator_id=g.creator.id).one()
     stats = {
-        'total_assets': DigitalAsset.query.filter_by(creator_id=g.creator.id).count(),
-        'published_count': DigitalAsset.query.filter_by(creator_id=g.creator.id, status=AssetStatus.PUBLISHED).count(),
-        'total_revenue': db.session.query(func.sum(DigitalAsset.total_revenue)).filter_by(creator_id=g.creator.id).scalar() or 0.0,
-        'total_sales': db.session.query(func.sum(DigitalAsset.total_sales)).filter_by(creator_id=g.creator.id).scalar() or 0
+        'total_assets': total_assets,
+        'published_count': published_count,
+        'total_revenue': total_revenue or 0.0,
+        'total_sales': total_sales or 0
     }
 
     return render_template(
         'admin/assets.html',
-        assets_json=json.dumps(assets_data, default=json_serial),
+        assets_json=to_json(assets_data),
         assets=assets_data,
         pagination=pagination,
         stats=stats,
@@ -699,15 +801,13 @@ def asset_new():
 @creator_login_required
 def asset_edit(asset_id):
     asset = DigitalAsset.query.filter_by(id=asset_id, creator_id=g.creator.id).first_or_404()
-    recent_purchases = Purchase.query.filter_by(asset_id=asset.id).order_by(Purchase.purchase_date.desc()).limit(5).all()
-    recent_comments = Comment.query.filter_by(asset_id=asset.id).order_by(Comment.created_at.desc()).limit(5).all()
 
     # --- Questionnaire responses ---
     has_questionnaire = bool(asset.custom_fields)
     # Jinja badge counts: only completed purchases
     responses = []
     if has_questionnaire:
-        completed = Purchase.query.filter_by(
+        completed = Purchase.query.options(db.joinedload(Purchase.customer)).filter_by(
             asset_id=asset.id, status=PurchaseStatus.COMPLETED
         ).order_by(Purchase.purchase_date.desc()).all()
         for p in completed:
@@ -722,9 +822,12 @@ def asset_edit(asset_id):
             })
 
     # Alpine activity feed: all purchases + comments as JSON
-    all_purchases = Purchase.query.filter_by(
+    # Customers are joined in up front; the "recent" lists are the head of the
+    # same newest-first results rather than separate queries.
+    all_purchases = Purchase.query.options(db.joinedload(Purchase.customer)).filter_by(
         asset_id=asset.id
     ).order_by(Purchase.purchase_date.desc()).limit(200).all()
+    recent_purchases = all_purchases[:5]
     activity_purchases = []
     for p in all_purchases:
         answers = {k: v for k, v in (p.ticket_data or {}).items() if k != 'tier'}
@@ -739,9 +842,10 @@ def asset_edit(asset_id):
             'filled': bool(answers),
         })
 
-    all_comments = Comment.query.filter_by(
+    all_comments = Comment.query.options(db.joinedload(Comment.customer)).filter_by(
         asset_id=asset.id
     ).order_by(Comment.created_at.desc()).limit(50).all()
+    recent_comments = all_comments[:5]
     activity_comments = [{
         'activity_type': 'comment',
         'purchase_id': None,
@@ -753,14 +857,14 @@ def asset_edit(asset_id):
         'filled': False,
     } for c in all_comments]
 
-    activity_json = json.dumps(activity_purchases + activity_comments)
+    activity_json = to_json(activity_purchases + activity_comments)
 
     return render_template(
         'admin/asset_view.html',
         asset=asset,
         recent_purchases=recent_purchases,
         recent_comments=recent_comments,
-        statuses=[s.value for s in AssetStatus],
+        statuses=ASSET_STATUS_VALUES,
         responses=responses,
         has_questionnaire=has_questionnaire,
         activity_json=activity_json,
@@ -787,8 +891,8 @@ def update_asset_details(asset_id):
         asset.price = decimal.Decimal(data.get('price', asset.price))
         
         new_status_str = data.get('status')
-        if new_status_str in [s.value for s in AssetStatus]:
-            asset.status = AssetStatus(new_status_str)
+        if new_status_str in ASSET_STATUS_BY_VALUE:
+            asset.status = ASSET_STATUS_BY_VALUE[new_status_str]
         
         # --- Slug Editing ---
         new_slug = data.get('slug', '').strip()
@@ -800,8 +904,7 @@ def update_asset_details(asset_id):
             # Only process if slug is actually changing
             if new_slug != asset.slug:
                 # Check uniqueness
-                existing = DigitalAsset.query.filter(DigitalAsset.slug == new_slug, DigitalAsset.id != asset.id).first()
-                if existing:
+                if DigitalAsset.slug_taken(new_slug, exclude_id=asset.id):
                     return jsonify({'success': False, 'message': f"The URL '{new_slug}' is already in use by another asset."}), 422
                 # Store old slug in details for redirect support
                 asset.details = dict(asset.details or {})
@@ -830,22 +933,6 @@ def update_asset_details(asset_id):
         current_app.logger.error(f"Error updating asset {asset_id} via API: {e}")
         return jsonify({'success': False, 'message': 'A server error occurred while saving.'}), 500
 
-    # --- RENDER THE VIEW/EDIT PAGE (GET request) ---
-    
-    # Fetch recent purchases for this asset
-    recent_purchases = Purchase.query.filter_by(asset_id=asset.id).order_by(Purchase.purchase_date.desc()).limit(5).all()
-    
-    # Fetch recent comments for this asset
-    recent_comments = Comment.query.filter_by(asset_id=asset.id).order_by(Comment.created_at.desc()).limit(5).all()
-
-    return render_template(
-        'admin/asset_view.html',
-        asset=asset,
-        recent_purchases=recent_purchases,
-        recent_comments=recent_comments,
-        statuses=[s.value for s in AssetStatus]
-    )
-
 @admin_bp.route('/assets/save', methods=['POST'])
 @creator_login_required
 def save_asset():
@@ -922,7 +1009,7 @@ def serve_content(file_id):
     # Check if user purchased the asset (if not creator)
     purchase = None
     if not is_creator:
-        customer = Customer.query.filter_by(whatsapp_number=customer_phone).first()
+        customer = get_customer_by_phone(customer_phone)
         if not customer:
             abort(403)
             
@@ -1181,8 +1268,7 @@ def save_asset_from_form(asset, req):
         from slugify import slugify as _slugify
         new_slug = _slugify(new_slug)
         if len(new_slug) >= 2 and new_slug != asset.slug:
-            existing = DigitalAsset.query.filter(DigitalAsset.slug == new_slug, DigitalAsset.id != asset.id).first()
-            if not existing:
+            if not DigitalAsset.slug_taken(new_slug, exclude_id=asset.id):
                 old_slugs = asset.details.get('old_slugs', [])
                 if asset.slug and asset.slug not in old_slugs:
                     old_slugs.append(asset.slug)
@@ -1271,7 +1357,7 @@ def save_asset_from_form(asset, req):
             storage_path = f"secure_uploads/{unique_filename}"
             
             # Infer type from filename
-            extension = filename.split('.')[-1].lower()
+            file_type = infer_file_type(filename)
         elif storage_path:
             # Check if it's a secure link that needs resolving
             if storage_path.startswith('/content/'):
@@ -1285,22 +1371,9 @@ def save_asset_from_form(asset, req):
             
             # If we resolved it (or it was external), infer type if missing
             if not file_type:
-                extension = storage_path.split('.')[-1].lower().split('?')[0]
+                file_type = infer_file_type(storage_path)
         else:
-            extension = ''
-
-        # Infer file type if not already set (from existing file)
-        if not file_type:
-            if extension in ['pdf']:
-                file_type = 'pdf'
-            elif extension in ['mp3', 'wav', 'ogg', 'm4a', 'aac']:
-                file_type = 'audio'
-            elif extension in ['mp4', 'webm', 'mov', 'avi']:
-                file_type = 'video'
-            elif extension in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'svg']:
-                file_type = 'image'
-            else:
-                file_type = 'other'
+            file_type = 'other'
         
         db.session.add(AssetFile(
             asset=asset, 
@@ -1322,13 +1395,16 @@ def assets_bulk_action():
     asset_ids, action = data.get('ids'), data.get('action')
     if not asset_ids or not action: return jsonify({'success': False, 'message': 'Missing data.'}), 400
     query = DigitalAsset.query.filter(DigitalAsset.id.in_(asset_ids), DigitalAsset.creator_id == g.creator.id)
-    if query.count() != len(asset_ids): return jsonify({'success': False, 'message': 'Authorization error or some assets not found.'}), 403
     try:
-        if action == 'publish': query.update({'status': AssetStatus.PUBLISHED}); msg = f"{len(asset_ids)} asset(s) published."
-        elif action == 'draft': query.update({'status': AssetStatus.DRAFT}); msg = f"{len(asset_ids)} asset(s) moved to drafts."
-        elif action == 'archive': query.update({'status': AssetStatus.ARCHIVED}); msg = f"{len(asset_ids)} asset(s) archived."
-        elif action == 'delete': query.delete(synchronize_session=False); msg = f"{len(asset_ids)} asset(s) permanently deleted."
+        # The write's own row count is the ownership check: if any id is missing
+        # or belongs to someone else, nothing is committed.
+        if action == 'publish': changed = query.update({'status': AssetStatus.PUBLISHED}); msg = f"{len(asset_ids)} asset(s) published."
+        elif action == 'draft': changed = query.update({'status': AssetStatus.DRAFT}); msg = f"{len(asset_ids)} asset(s) moved to drafts."
+        elif action == 'archive': changed = query.update({'status': AssetStatus.ARCHIVED}); msg = f"{len(asset_ids)} asset(s) archived."
+        elif action == 'delete': changed = query.delete(synchronize_session=False); msg = f"{len(asset_ids)} asset(s) permanently deleted."
         else: return jsonify({'success': False, 'message': 'Invalid action.'}), 400
+        if changed != len(asset_ids):
+            db.session.rollback(); return jsonify({'success': False, 'message': 'Authorization error or some assets not found.'}), 403
         db.session.commit()
         return jsonify({'success': True, 'message': msg})
     except Exception as e:
@@ -1549,7 +1625,7 @@ def supporters():
 
     return render_template(
         'admin/supporters.html',
-        supporters_json=json.dumps(supporters_data, default=json_serial),
+        supporters_json=to_json(supporters_data),
         supporters=supporters_data,
         pagination=pagination,
         assets=all_assets,
@@ -1616,7 +1692,7 @@ def supporter_detail(id):
         stats=stats,
         acquisition_refcode=acquisition_refcode,
         acquisition_source=acquisition_source,
-        activity_json=json.dumps(activity_items),
+        activity_json=to_json(activity_items),
         products=products
     )
 
@@ -1940,7 +2016,8 @@ def manage_settings():
             # saving the main Settings form never wipes it.
         ]
 
-        # Iterate and save each setting
+        # Collect every setting and save them in one upsert
+        values = {}
         for key in setting_keys:
             # Handle checkboxes, which are only present in form data if checked
             if key.endswith('_enabled') or key.endswith('_connected') or key.startswith('telegram_') or key.startswith('ai_feature_') or key in ['sync_events', 'send_reminders', 'check_conflicts']:
@@ -1952,7 +2029,9 @@ def manage_settings():
             if ('token' in key or 'pass' in key or '_sk' in key or '_pk' in key or '_secret' in key) and not value:
                 continue
             
-            g.creator.set_setting(key, value)
+            values[key] = value
+
+        g.creator.set_settings(values)
         
         # Handle file upload for store logo
         if 'store_logo' in request.files:
@@ -1982,12 +2061,11 @@ def manage_settings():
         return redirect(url_for('admin.manage_settings'))
 
     # --- DISPLAY SETTINGS LOGIC (GET request) ---
-    all_settings = CreatorSetting.query.filter_by(creator_id=g.creator.id).all()
-    settings_dict = {setting.key: setting.value for setting in all_settings}
+    settings_dict = dict(g.creator.settings_map())
     
     settings_dict['store_name'] = g.creator.store_name
     settings_dict['store_handle'] = g.creator.store_handle
-    settings_json = json.dumps(settings_dict, default=json_serial)
+    settings_json = to_json(settings_dict)
 
     return render_template('admin/settings.html', settings_json=settings_json)
 
@@ -2292,7 +2370,7 @@ def sms_campaigns():
     } for c in campaigns]
 
     return render_template('admin/campaigns_sms.html',
-                           campaigns_json=json.dumps(campaigns_data),
+                           campaigns_json=to_json(campaigns_data),
                            sms_configured=sms_configured,
                            assets=all_assets,
                            sms_templates=sms_templates,
@@ -2372,6 +2450,10 @@ def sms_campaign_save():
     return jsonify({'success': True, 'id': campaign.id, 'message': 'Campaign saved.'})
 
 
+# Campaign sends run off the request thread. A small fixed pool bounds how
+# many blasts hit the SMS provider at once; extra sends queue behind them.
+_CAMPAIGN_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sms-campaign')
+
 @admin_bp.route('/api/campaigns/sms/<int:campaign_id>/send', methods=['POST'])
 @creator_login_required
 def sms_campaign_send(campaign_id):
@@ -2411,38 +2493,47 @@ def sms_campaign_send(campaign_id):
             from models.nyota import Creator, SMSCampaign, SMSCampaignLog, db
             from services.sms_service import get_sms_provider
             from utils.phone import format_for_api
-            inner_creator = Creator.query.get(creator_id)
-            inner_provider = get_sms_provider(inner_creator)
-            inner_campaign = SMSCampaign.query.get(campaign_id_val)
-            if not inner_provider or not inner_campaign:
-                return
-            sent, failed = 0, 0
-            for phone in phones_list:
-                # Convert to international format (255XXXXXXXXX) for the SMS API
-                api_phone = format_for_api(phone)
-                success, resp = inner_provider.send_sms(api_phone, campaign_message)
-                db.session.add(SMSCampaignLog(
-                    campaign_id=campaign_id_val,
-                    phone_number=phone,
-                    status='sent' if success else 'failed',
-                    error_message=None if success else str(resp)[:500],
-                    sent_at=datetime.utcnow() if success else None
-                ))
-                inner_provider._log(creator_id, phone, campaign_message, 'CAMPAIGN',
-                                    success, campaign_id=campaign_id_val,
-                                    error=None if success else str(resp)[:500])
-                if success:
-                    sent += 1
-                else:
-                    failed += 1
-            inner_campaign.sent_count = sent
-            inner_campaign.failed_count = failed
-            inner_campaign.status = SMSCampaignStatus.SENT
-            inner_campaign.sent_at = datetime.utcnow()
-            db.session.commit()
+            # The executor parks exceptions on a Future nobody reads, so a failure
+            # must be logged and recorded here or the campaign stays in SENDING.
+            try:
+                inner_creator = db.session.get(Creator, creator_id)
+                inner_provider = get_sms_provider(inner_creator)
+                inner_campaign = db.session.get(SMSCampaign, campaign_id_val)
+                if not inner_provider or not inner_campaign:
+                    return
+                sent, failed = 0, 0
+                for phone in phones_list:
+                    # Convert to international format (255XXXXXXXXX) for the SMS API
+                    api_phone = format_for_api(phone)
+                    success, resp = inner_provider.send_sms(api_phone, campaign_message)
+                    db.session.add(SMSCampaignLog(
+                        campaign_id=campaign_id_val,
+                        phone_number=phone,
+                        status='sent' if success else 'failed',
+                        error_message=None if success else str(resp)[:500],
+                        sent_at=datetime.utcnow() if success else None
+                    ))
+                    inner_provider._log(creator_id, phone, campaign_message, 'CAMPAIGN',
+                                        success, campaign_id=campaign_id_val,
+                                        error=None if success else str(resp)[:500])
+                    if success:
+                        sent += 1
+                    else:
+                        failed += 1
+                inner_campaign.sent_count = sent
+                inner_campaign.failed_count = failed
+                inner_campaign.status = SMSCampaignStatus.SENT
+                inner_campaign.sent_at = datetime.utcnow()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception(f"SMS campaign #{campaign_id_val} send failed")
+                failed_campaign = db.session.get(SMSCampaign, campaign_id_val)
+                if failed_campaign:
+                    failed_campaign.status = SMSCampaignStatus.FAILED
+                    db.session.commit()
 
-    t = threading.Thread(target=_send, daemon=True)
-    t.start()
+    _CAMPAIGN_EXECUTOR.submit(_send)
 
     return jsonify({
         'success': True,
@@ -2648,13 +2739,31 @@ import logging
 sse_logger = logging.getLogger(__name__)
 
 class SseManager:
+    # Abandoned checkouts never get a payment callback, so their channels are
+    # swept once nothing has subscribed to or streamed from them for this long.
+    CHANNEL_IDLE_TTL = 30 * 60
+
     def __init__(self):
         self.channels = {}
+        self.last_seen = {}
         self.lock = threading.Lock()
 
+    def _sweep(self, now):
+        """Drops idle channels. Caller must hold self.lock."""
+        cutoff = now - self.CHANNEL_IDLE_TTL
+        stale = [cid for cid, seen in list(self.last_seen.items()) if seen < cutoff]
+        for cid in stale:
+            self.channels.pop(cid, None)
+            self.last_seen.pop(cid, None)
+        if stale:
+            sse_logger.info(f"Swept {len(stale)} idle SSE channel(s)")
+
     def subscribe(self, channel_id):
         """Subscribe to a channel. Creates it if it doesn't exist, reuses if it does."""
+        now = monotonic()
         with self.lock:
+            self._sweep(now)
+            self.last_seen[channel_id] = now
             if channel_id in self.channels:
                 # Channel already exists, reuse it (for reconnections)
                 sse_logger.info(f"Reconnecting to existing SSE channel: {channel_id}")
@@ -2666,71 +2775,44 @@ class SseManager:
                 sse_logger.info(f"Created new SSE channel: {channel_id}")
                 return q
 
+    def touch(self, channel_id):
+        """Marks a channel as in use so the idle sweep keeps it. Runs once per
+        heartbeat, so taking the lock here costs nothing measurable."""
+        with self.lock:
+            if channel_id in self.channels:
+                self.last_seen[channel_id] = monotonic()
+
     def unsubscribe(self, channel_id):
         """Unsubscribe from a channel. Only removes if no active connections."""
-        with self.lock:
-            # Don't immediately remove - keep for potential reconnections
-            # Channels will be cleaned up by a background task or timeout
-            sse_logger.info(f"Unsubscribe called for channel: {channel_id} (keeping alive for reconnections)")
-            pass
+        # Don't immediately remove - keep for potential reconnections.
+        # Idle channels are dropped by the sweep in subscribe().
+        sse_logger.info(f"Unsubscribe called for channel: {channel_id} (keeping alive for reconnections)")
 
     def cleanup_channel(self, channel_id):
         """Explicitly remove a channel (called after payment success/failure)"""
         with self.lock:
             removed = self.channels.pop(channel_id, None)
+            self.last_seen.pop(channel_id, None)
             if removed:
                 sse_logger.info(f"Cleaned up SSE channel: {channel_id}")
 
     def publish(self, channel_id, data):
-        with self.lock:
-            if channel_id in self.channels:
-                try:
-                    # Format data as a Server-Sent Event
-                    message = f"data: {json.dumps(data)}\n\n"
-                    self.channels[channel_id].put_nowait(message)
-                    sse_logger.info(f"Published to SSE channel {channel_id}: {data.get('status')}")
-                except queue.Full:
-                    sse_logger.warning(f"SSE channel {channel_id} queue is full. Message dropped.")
-            else:
-                sse_logger.warning(f"Attempted to publish to non-existent channel: {channel_id}")
+        # No lock needed here: dict.get is atomic under the GIL and queue.Queue
+        # is already thread-safe, so publishers never wait on subscribers.
+        q = self.channels.get(channel_id)
+        if q is None:
+            sse_logger.warning(f"Attempted to publish to non-existent channel: {channel_id}")
+            return
+        try:
+            # Format data as a Server-Sent Event
+            message = f"data: {orjson.dumps(data).decode()}\n\n"
+            q.put_nowait(message)
+            sse_logger.info(f"Published to SSE channel {channel_id}: {data.get('status')}")
+        except queue.Full:
+            sse_logger.warning(f"SSE channel {channel_id} queue is full. Message dropped.")
 
 sse_manager = SseManager()
 
-# Mock function to simulate the UZA payment gateway call and callback
-# In a real app, the UZA callback would hit a separate '/api/uza-callback' endpoint
-def simulate_uza_payment(channel_id, phone, asset_id):
-    # 1. Simulate API call to UZA
-    time.sleep(2)  # Network latency
-    current_app.logger.info(f"Pretending to call UZA API for phone {phone}...")
-    
-    # 2. Simulate user taking time to pay on their phone
-    time.sleep(8)
-    
-    # 3. Simulate UZA sending a callback to our server
-    current_app.logger.info(f"Simulating UZA callback for channel {channel_id}...")
-    
-    # Randomly decide if payment was successful or failed
-    import random
-    if random.random() > 0.15: # 85% success rate
-        # --- THIS IS WHAT YOUR REAL UZA CALLBACK ROUTE WOULD DO ---
-        # 1. Find the purchase record in your DB using a transaction ID
-        # 2. Update its status to 'PAID'
-        # 3. Create a customer if they don't exist
-        # 4. Publish success to the SSE channel
-        sse_manager.publish(channel_id, {
-            'status': 'SUCCESS', 
-            'message': 'Payment confirmed! Thank you.',
-            'redirect_url': url_for('main.library') # In a real app, this might be a unique download link
-        })
-    else:
-        sse_manager.publish(channel_id, {
-            'status': 'FAILED',
-            'message': 'The payment was declined by your provider.'
-        })
-    
-    # Clean up the SSE channel after completion
-    sse_manager.unsubscribe(channel_id)
-
 @main_bp.route('/')
 @limiter.limit("60 per minute")
 def landing_page():
@@ -2776,7 +2858,7 @@ def landing_page():
     # Sort available types to match Enum order or custom order if needed
     # AssetType is an Enum, so we can sort by name or value if we want consistent ordering
     # Let's sort by the order they are defined in the Enum
-    available_types.sort(key=lambda x: list(AssetType).index(x))
+    available_types.sort(key=ASSET_TYPE_ORDER.__getitem__)
 
     # Get user's purchase history for "Unpurchased First" logic
     # Only consider the user "logged in" for this purpose if they are verified
@@ -2785,7 +2867,7 @@ def landing_page():
     user_purchases = {} # Map asset_id -> status
     
     if customer_phone:
-        customer = Customer.query.filter_by(whatsapp_number=customer_phone).first()
+        customer = get_customer_by_phone(customer_phone)
         if customer:
             purchases = Purchase.query.filter_by(customer_id=customer.id).all()
             for p in purchases:
@@ -3043,17 +3125,21 @@ def asset_detail(slug):
             currency_symbol=creator.get_setting('currency_symbol', 'TZS') if creator else 'TZS'
         ), 404
 
-    # Fetch asset without status filter first
-    asset_obj = DigitalAsset.query.filter_by(slug=slug).first()
+    # Fetch asset without status filter first. to_dict() walks files and
+    # ratings (and each rating's customer), so load them up front.
+    asset_obj = DigitalAsset.query.filter_by(slug=slug).options(*ASSET_SERIALIZE_OPTIONS).first()
     
     # If not found by current slug, check old slugs for redirect
     if not asset_obj:
-        # Search for an asset that has this slug in its old_slugs list
-        all_assets = DigitalAsset.query.all()
-        for a in all_assets:
-            old_slugs = (a.details or {}).get('old_slugs', [])
-            if slug in old_slugs:
-                return redirect(url_for('main.asset_detail', slug=a.slug), code=301)
+        # Search for an asset that has this slug in its old_slugs list. The LIKE
+        # on the stored JSON text narrows candidates in SQL (unknown slugs, e.g.
+        # bot probes, no longer load every asset); the list check confirms.
+        candidates = db.session.query(DigitalAsset.slug, DigitalAsset.details).filter(
+            db.cast(DigitalAsset.details, db.Text).like(f'%"{slug}"%')
+        )
+        for current_slug, details in candidates:
+            if slug in (details or {}).get('old_slugs', []):
+                return redirect(url_for('main.asset_detail', slug=current_slug), code=301)
         # No match found
         return render_not_found()
     
@@ -3063,7 +3149,7 @@ def asset_detail(slug):
     has_purchased = False
     
     if customer_phone:
-        customer = Customer.query.filter_by(whatsapp_number=customer_phone).first()
+        customer = get_customer_by_phone(customer_phone)
         if customer:
             # Check for completed purchase logic
             purchase_query = Purchase.query.filter_by(
@@ -3094,11 +3180,11 @@ def asset_detail(slug):
         if not is_creator:
             return render_not_found()
             
-    creator = Creator.query.get(asset_obj.creator_id)
+    creator = db.session.get(Creator, asset_obj.creator_id)
     latest_purchase = None
 
     if customer_phone:
-        customer = Customer.query.filter_by(whatsapp_number=customer_phone).first()
+        customer = get_customer_by_phone(customer_phone)
         if customer:
             # Prefer COMPLETED purchase for UI state — a stale PENDING record
             # (e.g. from a duplicate attempt before the guard was in place) must
@@ -3148,7 +3234,7 @@ def asset_detail(slug):
         ev = asset_dict.get('eventDetails') or {}
         if ev.get('isOnline'):
             ev['link'] = None
-    asset_json = json.dumps(asset_dict, default=json_serial)
+    asset_json = to_json(asset_dict)
 
     # --- Construct Asset Metadata (Files & Types) ---
     asset_meta = {'total_files': 0, 'types': set()}
@@ -3235,7 +3321,7 @@ def asset_detail(slug):
 
 @main_bp.route('/checkout/<slug>')
 def checkout(slug):
-    asset = DigitalAsset.query.filter_by(slug=slug, status=AssetStatus.PUBLISHED).first_or_404()
+    asset = DigitalAsset.query.filter_by(slug=slug, status=AssetStatus.PUBLISHED).options(*ASSET_SERIALIZE_OPTIONS).first_or_404()
     creator = Creator.query.first()
     return render_template('user/checkout.html', asset=asset.to_dict(), channel_id=str(uuid.uuid4()), creator=creator, store_name=creator.store_name if creator else 'Nyota')
 
@@ -3329,7 +3415,7 @@ def initiate_payment():
     
             
     # Create a pending purchase
-    customer = Customer.query.filter_by(whatsapp_number=phone_number).first()
+    customer = get_customer_by_phone(phone_number)
     if not customer:
         customer = Customer(whatsapp_number=phone_number, language=language)
         db.session.add(customer)
@@ -3508,6 +3594,7 @@ def initiate_payment():
         # total_revenue stays unchanged (it's a free purchase)
         
         db.session.commit()
+        invalidate_dashboard_stats(asset.creator_id)
         
         # --- Session management: scope to this free purchase, preserving any
         # already-verified session for the same phone (see _apply_scoped_free_session) ---
@@ -3759,7 +3846,7 @@ def retry_payment():
     if not all([deal_id, new_phone_number, purchase_id]):
         return jsonify({'success': False, 'message': 'Missing data for retry.'}), 400
 
-    purchase = Purchase.query.get(purchase_id)
+    purchase = db.session.get(Purchase, purchase_id)
     if not purchase: 
         return jsonify({'success': False, 'message': 'Original purchase not found.'}), 404
 
@@ -3851,7 +3938,7 @@ def uza_payment_callback():
         if expected_secret:
             # If a secret is configured, we MUST verify it.
             incoming_secret = request.args.get('secret')
-            if not incoming_secret or incoming_secret != expected_secret:
+            if not incoming_secret or not hmac.compare_digest(incoming_secret.encode(), expected_secret.encode()):
                 current_app.logger.warning(f"UZA Callback: Invalid or missing secret. Expected verification.")
                 return jsonify({'status': 'error', 'message': 'Unauthorized'}), 403
         else:
@@ -3896,6 +3983,7 @@ def uza_payment_callback():
         asset.total_revenue = (asset.total_revenue or 0) + purchase.amount_paid
         
         db.session.commit()
+        invalidate_dashboard_stats(asset.creator_id)
         
         # --- SMS NOTIFICATION ---
         try:
@@ -4063,6 +4151,7 @@ def payment_stream(channel_id):
                 except queue.Empty:
                     # No message received in 5 seconds, send a heartbeat
                     # Comments (starting with :) keep the connection alive without triggering onmessage
+                    sse_manager.touch(channel_id)
                     yield f": heartbeat\n\n"
                     
         except GeneratorExit:
@@ -4099,7 +4188,7 @@ def magic_library_access(token):
         flash('This magic link has already been used the maximum number of times. Please use phone + date to unlock.', 'warning')
         return redirect(url_for('main.library'))
 
-    customer = Customer.query.filter_by(whatsapp_number=link.phone_number).first()
+    customer = get_customer_by_phone(link.phone_number)
     if not customer:
         flash('Could not find your account.', 'error')
         return redirect(url_for('main.library'))
@@ -4165,16 +4254,18 @@ def library():
         # Apply throttling
         if recent_failures >= 3:
             flash('Too many failed attempts. Please wait 15 minutes.', 'error')
+            creator = Creator.query.first()
             return render_template('user/library.html', customer_phone=None, purchases=[], 
-                                 store_name=Creator.query.first().store_name if Creator.query.first() else "Nyota",
-                                 creator=Creator.query.first(),
+                                 store_name=creator.store_name if creator else "Nyota",
+                                 creator=creator,
                                  currency_symbol='TZS', throttled=True), 429
         
         if hourly_failures >= 10:
             flash('Too many failed attempts. Please wait 1 hour.', 'error')
+            creator = Creator.query.first()
             return render_template('user/library.html', customer_phone=None, purchases=[],
-                                 store_name=Creator.query.first().store_name if Creator.query.first() else "Nyota",
-                                 creator=Creator.query.first(),
+                                 store_name=creator.store_name if creator else "Nyota",
+                                 creator=creator,
                                  currency_symbol='TZS', throttled=True), 429
         
         # Validate both fields are provided
@@ -4232,7 +4323,7 @@ def library():
     purchases = []
     purchases_data = []
     if customer_phone:
-        customer = Customer.query.filter_by(whatsapp_number=customer_phone).first()
+        customer = get_customer_by_phone(customer_phone)
         if customer:
             purchase_query = Purchase.query.filter_by(customer_id=customer.id)
             
@@ -4376,7 +4467,7 @@ def save_purchase_custom_data(purchase_id):
         return jsonify({'success': False, 'message': 'Not authenticated.'}), 401
 
     purchase = Purchase.query.get_or_404(purchase_id)
-    customer = Customer.query.filter_by(whatsapp_number=customer_phone).first()
+    customer = get_customer_by_phone(customer_phone)
     if not customer or purchase.customer_id != customer.id:
         return jsonify({'success': False, 'message': 'Unauthorized.'}), 403
 
@@ -4406,7 +4497,7 @@ def save_purchase_ticket_file(purchase_id):
         return jsonify({'success': False, 'message': 'Not authenticated.'}), 401
 
     purchase = Purchase.query.get_or_404(purchase_id)
-    customer = Customer.query.filter_by(whatsapp_number=customer_phone).first()
+    customer = get_customer_by_phone(customer_phone)
     if not customer or purchase.customer_id != customer.id:
         return jsonify({'success': False, 'message': 'Unauthorized.'}), 403
 
@@ -55,7 +55,7 @@ def _process_scheduled_campaigns():
         campaign.status = SMSCampaignStatus.SENDING
         db.session.commit()
 
-        creator = Creator.query.get(campaign.creator_id)
+        creator = db.session.get(Creator, campaign.creator_id)
         provider = get_sms_provider(creator)
 
         if not provider:
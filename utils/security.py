@@ -8,9 +8,9 @@ the generation and verification of authentication tokens.
 
 import pyotp
 import uuid
-from functools import wraps
+from functools import wraps, lru_cache
 from flask import session, redirect, url_for, flash, g, request, jsonify
-from models.nyota import Creator, Customer, Purchase # Assuming Purchase model will exist
+from models.nyota import db, Creator, Customer, Purchase # Assuming Purchase model will exist
 
 # --- Decorators for Route Protection ---
 
@@ -30,7 +30,7 @@ def creator_login_required(f):
         # 2. Fetch the creator from the database to ensure they still exist.
         #    This prevents issues if a creator is deleted but their session persists.
         #    We store the object in Flask's `g` for easy access in the view function.
-        g.creator = Creator.query.get(session['creator_id'])
+        g.creator = db.session.get(Creator, session['creator_id'])
         if g.creator is None:
             session.clear() # Clear the invalid session
             flash('Your account could not be found. Please log in again.', 'danger')
@@ -100,10 +100,21 @@ def get_totp_uri(username, secret):
         issuer_name="Nyota ✨"  # Customized for our application
     )
 
+# Stand-in for verify_totp() calls made without a real secret.
+_DUMMY_TOTP_SECRET = pyotp.random_base32()
+
+@lru_cache(maxsize=64)
+def _get_totp(secret):
+    """Returns a reusable TOTP verifier for `secret`, so repeated login
+    attempts don't construct a new one each time."""
+    return pyotp.TOTP(secret)
+
 def verify_totp(secret, token):
     """
     Verifies a given TOTP token (6-digit code from the app) against
-    the creator's stored secret.
+    the creator's stored secret. pyotp compares codes in constant time.
+    A missing secret is checked against a throwaway one and always fails,
+    so callers take the same time whether or not the account exists.
     """
-    totp = pyotp.TOTP(secret)
-    return totp.verify(token)
\ No newline at end of file
+    totp = _get_totp(secret or _DUMMY_TOTP_SECRET)
+    return bool(totp.verify(token or '')) and bool(secret)
\ No newline at end of file
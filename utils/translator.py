@@ -9,8 +9,23 @@ It works in tandem with Flask-Babel, which handles translations within Jinja2 te
 """
 
 import json
+from functools import lru_cache
 from flask import g
 
+
+@lru_cache(maxsize=8)
+def _load_catalog(lang_code: str):
+    """
+    Loads and caches the JSON catalog for a language. Catalogs ship with the
+    application and don't change at runtime, so each file is parsed once per
+    process. Returns None if the file is missing or corrupt.
+    """
+    try:
+        with open(f'locales/{lang_code}.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
 def translate(key: str, **kwargs) -> str:
     """
     Translates a key into the currently selected language, with variable replacement.
@@ -30,22 +45,14 @@ def translate(key: str, **kwargs) -> str:
     # Use g.language, which is set on every request. Default to 'sw'.
     lang_code = getattr(g, 'language', 'sw')
 
-    # Define file paths relative to the application root
-    default_lang_path = 'locales/sw.json'
-    selected_lang_path = f'locales/{lang_code}.json'
-
-    try:
-        with open(selected_lang_path, 'r', encoding='utf-8') as f:
-            translations = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Fallback to English if the selected language file is missing or corrupt
-        try:
-            with open(default_lang_path, 'r', encoding='utf-8') as f:
-                translations = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            # Absolute fallback: if even the English file is gone, return the raw key.
-            # This prevents a crash and helps developers spot the missing file.
-            return key
+    # Fallback to the default language if the selected file is missing or corrupt
+    translations = _load_catalog(lang_code)
+    if translations is None:
+        translations = _load_catalog('sw')
+    if translations is None:
+        # Absolute fallback: if even the default file is gone, return the raw key.
+        # This prevents a crash and helps developers spot the missing file.
+        return key
 
     # Get the base translated string, or return the key itself if not found.
     # This helps developers identify which translation keys are missing.